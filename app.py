@@ -1,14 +1,42 @@
-from db import get_conn, init_db, seed_procedures   # ← mutlak import
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from db import get_conn, init_db, seed_procedures, tenant_catalog   # ← mutlak import
+from compress import init_compression
+from tenants import init_tenants, metrics as tenant_metrics
+import db
+import queries as q
+import exports
+import series as series_mod
+from audit import AuditLog
+from profiling import init_profiling
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, abort
 from datetime import datetime
 import json
+import os
 app = Flask(__name__)  # ← varsayılan yollar: ./templates ve ./static
 app.secret_key = "dev-secret"  # (tersine, prod’da ENV değişkeninden alabilirsin)
+# JSON: anahtar sıralama yok, boşluksuz, Türkçe karakterler \uXXXX kaçışsız (daha az CPU ve bayt)
+app.json.sort_keys = False
+app.json.compact = True
+app.json.ensure_ascii = False
+init_compression(app)
+MULTI_TENANT = init_tenants(app)
 
 init_db()
 seed_procedures()
 
-VALID_USERS = {"dr": {"password": "1234"}}
+audit_log = AuditLog(db.INSTANCE_DIR / "audit.db")
+
+def audit(action, appt_id=None, patient_tc=None, detail=None):
+    audit_log.log(action, username=session.get("user"), tenant=db.current_tenant(),
+                  appt_id=appt_id, patient_tc=patient_tc, detail=detail,
+                  remote_addr=request.remote_addr)
+
+VALID_USERS = {"dr": {"password": "1234", "role": "admin"}}
+
+def is_admin() -> bool:
+    u = VALID_USERS.get(session.get("user"))
+    return bool(u) and u.get("role") == "admin"
+
+init_profiling(app, is_admin)
 
 def login_required(view):
     def wrapper(*args, **kwargs):
@@ -42,27 +70,17 @@ def logout():
     session.clear()
     return redirect(url_for("login"))
 
-def list_procedures():
+def _load_procedures():
     with get_conn() as con:
-        rows = con.execute(
-            "SELECT id, name, default_duration_min, requirements_json "
-            "FROM procedure_types WHERE active=1 ORDER BY name"
-        ).fetchall()
+        rows = con.execute(q.LIST_PROCEDURES).fetchall()
     return rows
 
+def list_procedures():
+    return tenant_catalog(_load_procedures)
+
 def list_day_appointments(day_str):
     with get_conn() as con:
-        rows = con.execute("""
-            SELECT a.id, a.patient_name, a.patient_tc, a.date, a.duration_min,
-                   a.anticoagulant, a.antiplatelet, a.anesthesia,
-                   a.med_note, a.lab_notes, a.prep_notes,
-                   a.custom_proc_name,
-                   pt.name AS proc_name
-            FROM appointments a
-            JOIN procedure_types pt ON pt.id = a.procedure_type_id
-            WHERE a.date = ?
-            ORDER BY a.id DESC
-        """, (day_str,)).fetchall()
+        rows = con.execute(q.DAY_APPOINTMENTS, (day_str,)).fetchall()
     return rows
 
 @app.route("/")
@@ -76,6 +94,27 @@ def agenda():
     appts = list_day_appointments(day_iso)
     return render_template("agenda.html", day_iso=day_iso, appts=appts, user=session["user"])
 
+# --- Günlük iş listesi çıktısı (yazdırma için PDF / CSV) ---
+@app.route("/agenda/export.<fmt>")
+@login_required
+def agenda_export(fmt: str):
+    if fmt not in exports.FORMATS:
+        abort(404)
+    day_iso = request.args.get("date") or datetime.now().strftime("%Y-%m-%d")
+    try:
+        # 2025-3-14 -> 2025-03-14; aksi halde boş bir liste üretilip önbelleğe yazılır
+        day_iso = datetime.strptime(day_iso, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        abort(400)
+    fh = exports.cached_export(day_iso, fmt)
+    audit("export", detail=f"{day_iso}.{fmt}")
+    st = os.fstat(fh.fileno())
+    response = send_file(fh, mimetype=exports.FORMATS[fmt], as_attachment=(fmt == "csv"),
+                         download_name=f"is_listesi_{day_iso}.{fmt}",
+                         etag=os.path.basename(fh.name), last_modified=st.st_mtime)
+    response.content_length = st.st_size
+    return response
+
 @app.route("/new", methods=["GET","POST"])
 @login_required
 def new():
@@ -102,29 +141,83 @@ def new():
             return redirect(url_for("new", date=day_iso))
 
         with get_conn() as con:
-            con.execute("""
-                INSERT INTO appointments
-                  (patient_name, patient_tc, procedure_type_id, duration_min, date,
-                   anticoagulant, antiplatelet, anesthesia, med_note,
-                   lab_notes, prep_notes, req_checks_json, doctor_username, custom_proc_name)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """, (patient, patient_tc, proc_id, duration, day_iso,
-                  antico, antip, anes, med_note,
-                  lab_notes or None, prep_notes or None, req_json, session["user"], custom_proc_name or None))
+            appt_id = con.execute(q.INSERT_APPOINTMENT, (
+                patient, patient_tc, proc_id, duration, day_iso,
+                antico, antip, anes, med_note,
+                lab_notes or None, prep_notes or None, req_json, session["user"], custom_proc_name or None)).lastrowid
             con.commit()
+        audit("create", appt_id=appt_id, patient_tc=patient_tc)
 
         flash("Randevu kaydedildi.", "success")
         return redirect(url_for("agenda", date=day_iso))
 
     return render_template("new.html", day_iso=day_iso, procs=procs, user=session["user"])
 
+# --- Bağlı seri randevu (tek transaction) ---
+def audit_series(series_id, ids, patient_tc):
+    # appt_id ile sorgulanabilsin diye her randevu için ayrı "create" olayı
+    for appt_id in ids:
+        audit("create", appt_id=appt_id, patient_tc=patient_tc, detail=f"series={series_id}")
+
+def _series_from_form(form):
+    steps = []
+    for proc_id, date_iso, dur, anes, custom in zip(
+            form.getlist("step_procedure_type_id"), form.getlist("step_date"),
+            form.getlist("step_duration_min"), form.getlist("step_anesthesia"),
+            form.getlist("step_custom_proc_name")):
+        if not proc_id and not date_iso:
+            continue  # boş bırakılan satır
+        steps.append({"procedure_type_id": proc_id, "date": date_iso, "duration_min": dur,
+                      "anesthesia": anes, "custom_proc_name": custom})
+    payload = {k: form.get(k) for k in ("label", "patient_name", "patient_tc", "anticoagulant",
+                                        "antiplatelet", "med_note", "lab_notes", "prep_notes")}
+    payload["steps"] = steps
+    return payload
+
+@app.route("/api/series", methods=["POST"])
+@login_required
+def api_series():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "JSON gövde bekleniyor"}), 400
+    data, errors = series_mod.validate_series(payload, list_procedures())
+    if errors:
+        return jsonify({"error": "validation", "errors": errors}), 400
+    with get_conn() as con:
+        series_id, ids = series_mod.create_series(con, data, session["user"])
+    audit_series(series_id, ids, data["patient_tc"])
+    return jsonify({"series_id": series_id, "ids": ids}), 201
+
+@app.route("/series", methods=["GET","POST"])
+@login_required
+def new_series():
+    day_iso = request.args.get("date") or datetime.now().strftime("%Y-%m-%d")
+    procs = list_procedures()
+    if request.method == "POST":
+        payload = _series_from_form(request.form)
+        data, errors = series_mod.validate_series(payload, procs)
+        if errors:
+            for e in errors:
+                flash(e, "warning")
+            return render_template("series.html", day_iso=day_iso, procs=procs, form=request.form,
+                                   steps=payload["steps"], user=session["user"]), 400
+        with get_conn() as con:
+            series_id, ids = series_mod.create_series(con, data, session["user"])
+        audit_series(series_id, ids, data["patient_tc"])
+        flash(f"Seri kaydedildi ({len(ids)} randevu).", "success")
+        return redirect(url_for("agenda", date=data["steps"][0]["date"]))
+    return render_template("series.html", day_iso=day_iso, procs=procs, form={},
+                           steps=[{"date": day_iso}], user=session["user"])
+
 @app.route("/delete/<int:appt_id>", methods=["POST"])
 @login_required
 def delete_appt(appt_id: int):
     day_iso = request.form.get("day_iso")
     with get_conn() as con:
-        con.execute("DELETE FROM appointments WHERE id = ?", (appt_id,))
+        row = con.execute(q.APPT_PATIENT_TC, (appt_id,)).fetchone()
+        con.execute(q.DELETE_APPOINTMENT, (appt_id,))
         con.commit()
+    audit("delete", appt_id=appt_id, patient_tc=row["patient_tc"] if row else None)
     flash("Randevu silindi.", "success")
     return redirect(url_for("agenda", date=day_iso or datetime.now().strftime("%Y-%m-%d")))
 
@@ -136,37 +229,74 @@ def search():
     results = []
     if tc:
         with get_conn() as con:
-            results = con.execute("""
-                SELECT a.id, a.patient_name, a.patient_tc, a.date,
-                       pt.name AS proc_name, a.custom_proc_name, a.anesthesia
-                FROM appointments a
-                JOIN procedure_types pt ON pt.id = a.procedure_type_id
-                WHERE a.patient_tc LIKE ?
-                ORDER BY a.date DESC, a.id DESC
-            """, (f"%{tc}%",)).fetchall()
+            results = con.execute(*q.search_by_tc(tc)).fetchall()
+        audit("search", patient_tc=tc, detail=f"{len(results)} sonuç")
     return render_template("search.html", tc=tc, results=results, user=session["user"])
 
+def parse_fields(raw, allowed):
+    """'a,b' -> (alanlar, bilinmeyenler); boşsa tüm alanlar. id her zaman dahil."""
+    raw = (raw or "").strip()
+    if not raw:
+        return list(allowed), []
+    fields = ["id"]
+    for f in raw.split(","):
+        f = f.strip()
+        if f and f not in fields:
+            fields.append(f)
+    return fields, [f for f in fields if f not in allowed]
+
 # --- Randevu detayını modal için JSON döndür ---
 @app.route("/api/appt/<int:appt_id>")
 @login_required
 def appt_detail(appt_id: int):
+    fields, unknown = parse_fields(request.args.get("fields"), q.APPT_FIELDS)
+    if unknown:
+        return jsonify({"error": "unknown fields", "fields": unknown}), 400
+    # denetim kaydı hangi hastanın görüldüğünü bilmeli; fields= patient_tc'yi dışlasa bile seçilir
+    sql_fields = fields if "patient_tc" in fields else fields + ["patient_tc"]
     with get_conn() as con:
-        row = con.execute("""
-            SELECT a.id, a.patient_name, a.patient_tc, a.date, a.duration_min,
-                   a.anticoagulant, a.antiplatelet, a.anesthesia, a.med_note,
-                   a.lab_notes, a.prep_notes, a.req_checks_json,
-                   a.custom_proc_name, pt.name AS proc_name
-            FROM appointments a
-            JOIN procedure_types pt ON pt.id = a.procedure_type_id
-            WHERE a.id = ?
-        """, (appt_id,)).fetchone()
+        row = con.execute(q.appt_detail_sql(sql_fields), (appt_id,)).fetchone()
     if not row:
         return jsonify({"error":"not found"}), 404
-    data = dict(row)
-    # req_checks_json normalize
-    try:
-        parsed = json.loads(data.get("req_checks_json") or "{}")
-    except Exception:
-        parsed = {}
-    data["req_checks"] = parsed.get("checked", [])
+    data = dict(zip(sql_fields, row))
+    patient_tc = data["patient_tc"] if "patient_tc" in fields else data.pop("patient_tc")
+    audit("view", appt_id=appt_id, patient_tc=patient_tc)
+    if "req_checks" in data:
+        # req_checks_json normalize
+        try:
+            parsed = json.loads(data["req_checks"] or "{}")
+        except Exception:
+            parsed = {}
+        data["req_checks"] = parsed.get("checked", [])
     return jsonify(data)
+
+# --- Bölüm (tenant) metrikleri ---
+@app.route("/api/tenants/metrics")
+@login_required
+def tenant_metrics_view():
+    if not is_admin():
+        return jsonify({"error": "yetkisiz"}), 403
+    return jsonify({
+        "multi_tenant": MULTI_TENANT,
+        "current": db.current_tenant(),
+        "catalog_cache_size": db.tenant_cache.maxsize,
+        "tenants": tenant_metrics.snapshot(),
+    })
+
+# --- KVKK erişim kaydı sorgusu ---
+@app.route("/api/audit")
+@login_required
+def audit_query():
+    if not is_admin():
+        return jsonify({"error": "yetkisiz"}), 403
+    args = request.args
+    try:
+        appt_id = int(args["appt_id"]) if args.get("appt_id") else None
+        limit = min(int(args.get("limit") or 200), 1000)
+    except ValueError:
+        return jsonify({"error": "appt_id ve limit sayı olmalı"}), 400
+    events = audit_log.query(tenant=db.current_tenant(), username=args.get("user"), patient_tc=args.get("tc"),
+                             appt_id=appt_id, action=args.get("action"),
+                             since=args.get("since"), until=args.get("until"), limit=limit)
+    audit("audit_query", detail=request.query_string.decode("utf-8", "replace") or None)
+    return jsonify({"events": events, "stats": dict(audit_log.stats)})
@@ -0,0 +1,164 @@
+# KVKK erişim kaydı: kim hangi hastanın verisini gördü/değiştirdi.
+#
+# İstek yolu yalnızca bellekteki kuyruğa ekler (kilit/commit yok); arka plandaki
+# yazıcı thread olayları toplu halde ayrı bir SQLite dosyasına (instance/audit.db)
+# tek transaction ile yazar. Ana veritabanının yazma kilidi hiç kullanılmaz.
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+AUDIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+  id INTEGER PRIMARY KEY,
+  ts TEXT NOT NULL,
+  username TEXT,
+  tenant TEXT,
+  action TEXT NOT NULL,
+  appt_id INTEGER,
+  patient_tc TEXT,
+  detail TEXT,
+  remote_addr TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_events(ts);
+CREATE INDEX IF NOT EXISTS idx_audit_tenant ON audit_events(tenant, id);
+CREATE INDEX IF NOT EXISTS idx_audit_tc ON audit_events(patient_tc);
+CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_events(username);
+CREATE INDEX IF NOT EXISTS idx_audit_appt ON audit_events(appt_id);
+"""
+
+INSERT_EVENT = """
+    INSERT INTO audit_events (ts, username, tenant, action, appt_id, patient_tc, detail, remote_addr)
+    VALUES (?,?,?,?,?,?,?,?)
+"""
+
+_STOP = object()
+
+class AuditLog:
+    def __init__(self, path: Path, maxsize: int = 10_000, batch_size: int = 200,
+                 flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=10)
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def _ensure_started(self):
+        # gunicorn --preload ile fork sonrası thread çocuk süreçte yoktur; pid değişince yeniden başlat
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            con = self._connect()
+            con.executescript(AUDIT_SCHEMA)
+            con.close()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+            atexit.unregister(self.close)  # yeniden başlatmada çift kayıt olmasın
+            atexit.register(self.close)
+
+    def log(self, action: str, username=None, tenant=None, appt_id=None,
+            patient_tc=None, detail=None, remote_addr=None):
+        """Olayı kuyruğa ekler; asla bloklamaz. Kuyruk doluysa olay düşürülür ve sayılır."""
+        self._ensure_started()
+        event = (datetime.now().isoformat(timespec="milliseconds"), username, tenant, action,
+                 appt_id, patient_tc or None, detail, remote_addr)
+        try:
+            self._queue.put_nowait(event)
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+            log.warning("audit kuyruğu dolu, olay düşürüldü: %s %s", action, appt_id)
+
+    def _run(self):
+        con = self._connect()
+        try:
+            stop = False
+            while not stop:
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=max(timeout, 0)) if timeout > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                if batch:
+                    self._write(con, batch)
+        finally:
+            con.close()
+
+    def _write(self, con, batch):
+        try:
+            with con:
+                con.executemany(INSERT_EVENT, batch)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except sqlite3.Error:
+            self.stats["errors"] += 1
+            log.exception("audit toplu yazma başarısız (%d olay)", len(batch))
+
+    def close(self, timeout: float = 5.0):
+        """Kuyruktaki her şeyi yazar ve thread'i durdurur (kapanışta atexit ile çağrılır)."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        self._queue.put(_STOP)  # kuyruk dolu olsa da yazıcı boşalttıkça yer açılır
+        thread.join(timeout)
+        self._thread = None
+
+    def query(self, tenant=None, username=None, patient_tc=None, appt_id=None, action=None,
+              since=None, until=None, limit: int = 200):
+        """Tek bir tenant'ın diske yazılmış olaylarını döndürür (en fazla flush_interval gecikmeli).
+
+        tenant=None tek bölüm modundaki (tenant'sız) olaylar demektir; bölümler birbirinin
+        kayıtlarını göremez.
+        """
+        self._ensure_started()
+        if tenant is None:
+            where, params = ["tenant IS NULL"], []
+        else:
+            where, params = ["tenant = ?"], [tenant]
+        for col, val in (("username", username), ("patient_tc", patient_tc),
+                         ("appt_id", appt_id), ("action", action)):
+            if val not in (None, ""):
+                where.append(f"{col} = ?")
+                params.append(val)
+        if since:
+            where.append("ts >= ?")
+            params.append(since)
+        if until:
+            where.append("ts < ?")
+            params.append(until)
+        sql = "SELECT * FROM audit_events WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        con = self._connect()
+        try:
+            return [dict(r) for r in con.execute(sql, params)]
+        finally:
+            con.close()
@@ -0,0 +1,30 @@
+# Yavaş koğuş Wi-Fi'si için JSON/HTML yanıtlarını gzip ile sıkıştırır.
+import gzip
+from flask import current_app, request
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html"}
+
+def _accepts_gzip() -> bool:
+    # Werkzeug q değerlerini ve "*" önceliğini doğru çözer ("*;q=0, gzip" -> gzip kabul)
+    return request.accept_encodings.quality("gzip") > 0
+
+def _gzip_response(response):
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or not _accepts_gzip()):
+        return response
+    body = response.get_data()
+    if len(body) < current_app.config["GZIP_MIN_SIZE"]:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=current_app.config["GZIP_LEVEL"]))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+def init_compression(app):
+    app.config.setdefault("GZIP_MIN_SIZE", 1024)  # bunun altında sıkıştırma kazandırmaz
+    app.config.setdefault("GZIP_LEVEL", 6)
+    app.after_request(_gzip_response)
@@ -2,7 +2,12 @@
 import sqlite3
 from pathlib import Path
 import json
+import os
+import re
 import sys
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
 
 def _app_base_dir() -> Path:
     # PyInstaller ile paketlenince app base, exe'nin klasörü olur
@@ -11,7 +16,12 @@ def _app_base_dir() -> Path:
     # Geliştirici modunda: /app klasörünün bir üstü (proje kökü)
     return Path(__file__).resolve().parents[1]
 
-DB_PATH = _app_base_dir() / "instance" / "app.db"
+INSTANCE_DIR = _app_base_dir() / "instance"
+DB_PATH = INSTANCE_DIR / "app.db"
+# Çoklu bölüm modu: her bölümün (tenant) ayrı SQLite dosyası ve işlem kataloğu olur
+TENANT_DIR = INSTANCE_DIR / "tenants"
+TENANT_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,31}$")
+TENANT_CACHE_SIZE = int(os.environ.get("IR_TENANT_CACHE_SIZE", "32"))
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS users (
@@ -44,10 +54,40 @@ CREATE TABLE IF NOT EXISTS appointments (
   custom_proc_name TEXT,
   patient_tc TEXT,            -- opsiyonel TC
   lab_notes TEXT,             -- opsiyonel lab notu
-  prep_notes TEXT             -- opsiyonel hazırlık notu
+  prep_notes TEXT,            -- opsiyonel hazırlık notu
+  series_id INTEGER           -- bağlı seri (TARE MAA -> TARE vb.), opsiyonel
+);
+
+CREATE TABLE IF NOT EXISTS appointment_series (
+  id INTEGER PRIMARY KEY,
+  label TEXT,
+  patient_name TEXT NOT NULL,
+  patient_tc TEXT,
+  doctor_username TEXT NOT NULL,
+  created_at TEXT NOT NULL
 );
 CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(date);
 CREATE INDEX IF NOT EXISTS idx_appointments_tc ON appointments(patient_tc);
+
+-- Gün sürümü: o günün randevuları her değiştiğinde artar (çıktı önbelleği anahtarı)
+CREATE TABLE IF NOT EXISTS day_versions (
+  date TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_appointments_ins_version AFTER INSERT ON appointments BEGIN
+  INSERT INTO day_versions(date, version) VALUES (NEW.date, 1)
+    ON CONFLICT(date) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_appointments_del_version AFTER DELETE ON appointments BEGIN
+  INSERT INTO day_versions(date, version) VALUES (OLD.date, 1)
+    ON CONFLICT(date) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_appointments_upd_version AFTER UPDATE ON appointments BEGIN
+  INSERT INTO day_versions(date, version) VALUES (OLD.date, 1)
+    ON CONFLICT(date) DO UPDATE SET version = version + 1;
+  INSERT INTO day_versions(date, version) VALUES (NEW.date, 1)
+    ON CONFLICT(date) DO UPDATE SET version = version + 1;
+END;
 """
 
 # Genişletilmiş işlem listesi (süreler örnek, dilediğinde düzenleyebilirsin)
@@ -77,12 +117,156 @@ SEED_PROCS = [
   ("Diğer (serbest giriş)", 60, {"checklist": ["Serbest not alanını doldurun"]}),
 ]
 
-def get_conn():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
+_current_tenant: ContextVar = ContextVar("ir_tenant", default=None)
+
+def current_tenant():
+    """Aktif istek için tenant adı; tek bölüm modunda None."""
+    return _current_tenant.get()
+
+def set_tenant(name):
+    return _current_tenant.set(name)
+
+def reset_tenant(token):
+    _current_tenant.reset(token)
+
+def tenant_db_path(tenant) -> Path:
+    if tenant is None:
+        return DB_PATH
+    if not TENANT_NAME_RE.match(tenant):
+        raise ValueError(f"geçersiz tenant adı: {tenant!r}")
+    return TENANT_DIR / f"{tenant}.db"
+
+def tenant_seed_procs(tenant):
+    # instance/tenants/<tenant>.seed.json varsa bölüme özel katalog, yoksa varsayılan liste
+    if tenant is not None:
+        seed_file = TENANT_DIR / f"{tenant}.seed.json"
+        if seed_file.exists():
+            return [tuple(item) for item in json.loads(seed_file.read_text(encoding="utf-8"))]
+    return SEED_PROCS
+
+class _TenantEntry:
+    __slots__ = ("path", "catalog")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.catalog = None
+
+class TenantCache:
+    """Tenant'ların veritabanı yolunu ve işlem kataloğunu tutan LRU önbellek.
+
+    Bağlantı önbelleğe alınmaz: her istek kendi kısa ömürlü bağlantısını açar ve
+    istek sonunda kapatır (bkz. begin_request/end_request), böylece açık dosya
+    sayısı eşzamanlı istek sayısıyla sınırlı kalır ve istekler transaction paylaşmaz.
+    Şema/seed hazırlığı süreç başına tenant başına bir kez, yalnızca o tenant'ın
+    kilidi altında yapılır; önbellekten düşen tenant yalnızca kataloğunu kaybeder.
+    """
+
+    def __init__(self, maxsize: int = TENANT_CACHE_SIZE):
+        self.maxsize = max(1, maxsize)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()           # yalnızca _entries/stats için, kısa süreli
+        self._tenant_locks = {}                 # tenant -> hazırlık kilidi
+        self._prepared = set()
+        self.stats = {}
+
+    def _stat(self, tenant, key):
+        st = self.stats.setdefault(tenant, {"hits": 0, "loads": 0, "evictions": 0})
+        st[key] += 1
+
+    def _lookup(self, tenant):
+        with self._lock:
+            ent = self._entries.get(tenant)
+            if ent is not None:
+                self._entries.move_to_end(tenant)
+                self._stat(tenant, "hits")
+            return ent
+
+    def entry(self, tenant) -> _TenantEntry:
+        ent = self._lookup(tenant)
+        if ent is not None:
+            return ent
+        with self._lock:
+            tenant_lock = self._tenant_locks.setdefault(tenant, threading.Lock())
+        # dosya açma/şema/seed diğer tenant'ları bekletmesin diye genel kilidin dışında
+        with tenant_lock:
+            ent = self._lookup(tenant)
+            if ent is not None:
+                return ent
+            if tenant not in self._prepared:
+                _prepare_tenant(tenant)
+                self._prepared.add(tenant)
+            ent = _TenantEntry(tenant_db_path(tenant))
+            with self._lock:
+                self._entries[tenant] = ent
+                self._stat(tenant, "loads")
+                while len(self._entries) > self.maxsize:
+                    old_tenant, _ = self._entries.popitem(last=False)
+                    self._stat(old_tenant, "evictions")
+            return ent
+
+    def cached_tenants(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+tenant_cache = TenantCache()
+
+# İstek boyunca açılan tenant bağlantıları; TenantMiddleware istek sonunda kapatır
+_request_conns: ContextVar = ContextVar("ir_request_conns", default=None)
+
+def begin_request():
+    return _request_conns.set({})
+
+def end_request(token):
+    conns = _request_conns.get()
+    _request_conns.reset(token)
+    for con in (conns or {}).values():
+        con.close()
+
+def _connect(path: Path, **kwargs):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path, **kwargs)
     con.row_factory = sqlite3.Row
     return con
 
+def _prepare_tenant(tenant) -> Path:
+    path = tenant_db_path(tenant)
+    con = _connect(path)
+    try:
+        _apply_schema(con)
+        # katalog zaten varsa tekrar seed yazılmaz (gereksiz yazma kilidi)
+        if con.execute("SELECT 1 FROM procedure_types LIMIT 1").fetchone() is None:
+            _seed(con, tenant_seed_procs(tenant))
+    finally:
+        con.close()
+    return path
+
+def get_conn():
+    tenant = current_tenant()
+    if tenant is None:
+        return _connect(DB_PATH)
+    path = tenant_cache.entry(tenant).path
+    conns = _request_conns.get()
+    if conns is None:  # istek dışında (betik, test): çağıran sahiplenir
+        return _connect(path)
+    con = conns.get(tenant)
+    if con is None:
+        con = conns[tenant] = _connect(path)
+    return con
+
+def tenant_catalog(loader):
+    """İşlem kataloğu tenant başına bir kez yüklenir; tek bölüm modunda her seferinde."""
+    tenant = current_tenant()
+    if tenant is None:
+        return loader()
+    ent = tenant_cache.entry(tenant)
+    if ent.catalog is None:
+        ent.catalog = loader()
+    return ent.catalog
+
 def _migrate_add_columns(con: sqlite3.Connection):
     cols = [r["name"] for r in con.execute("PRAGMA table_info(appointments)").fetchall()]
     def add(col, ddl):
@@ -93,18 +277,25 @@ def _migrate_add_columns(con: sqlite3.Connection):
     add("patient_tc", "patient_tc TEXT")
     add("lab_notes", "lab_notes TEXT")
     add("prep_notes", "prep_notes TEXT")
+    add("series_id", "series_id INTEGER")
+    con.commit()
+
+def _apply_schema(con: sqlite3.Connection):
+    con.executescript(SCHEMA)
+    _migrate_add_columns(con)
+
+def _seed(con: sqlite3.Connection, procs):
+    for name, dur, req in procs:
+        con.execute(
+            "INSERT OR IGNORE INTO procedure_types(name, default_duration_min, requirements_json) VALUES (?,?,?)",
+            (name, dur, json.dumps(req, ensure_ascii=False))
+        )
     con.commit()
 
 def init_db():
     with get_conn() as con:
-        con.executescript(SCHEMA)
-        _migrate_add_columns(con)
+        _apply_schema(con)
 
 def seed_procedures():
     with get_conn() as con:
-        for name, dur, req in SEED_PROCS:
-            con.execute(
-                "INSERT OR IGNORE INTO procedure_types(name, default_duration_min, requirements_json) VALUES (?,?,?)",
-                (name, dur, json.dumps(req, ensure_ascii=False))
-            )
-        con.commit()
+        _seed(con, SEED_PROCS)
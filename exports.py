@@ -0,0 +1,180 @@
+# Günlük iş listesinin yazdırılabilir çıktıları (PDF/CSV).
+#
+# Çıktı gün sürümü (day_versions) başına bir kez üretilip instance/exports altına
+# yazılır; sabah aynı listeyi basan herkes diskteki dosyayı alır. Randevu eklenince
+# ya da silinince sürüm artar ve bir sonraki istek yeni dosyayı üretir.
+import csv
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+
+import db
+import queries as q
+
+log = logging.getLogger(__name__)
+
+EXPORT_DIR = db.INSTANCE_DIR / "exports"
+FORMATS = {"csv": "text/csv", "pdf": "application/pdf"}
+
+# Türkçe karakterler için gömülecek TTF adayları; bulunamazsa Helvetica kullanılır
+PDF_FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    r"C:\Windows\Fonts\arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+]
+
+# Sabit sayıda kilit (anahtar başına kilit sözlüğü her gün için büyürdü)
+_LOCKS = [threading.Lock() for _ in range(32)]
+
+def _lock_for(key):
+    return _LOCKS[hash(key) % len(_LOCKS)]
+
+def _drugs(a) -> str:
+    parts = []
+    if a["anticoagulant"]:
+        parts.append("Antikoagülan")
+    if a["antiplatelet"]:
+        parts.append("Antiagregan")
+    return " + ".join(parts) or "—"
+
+def _rows(appts):
+    for a in appts:
+        yield {
+            "İşlem": a["custom_proc_name"] or a["proc_name"],
+            "Süre (dk)": a["duration_min"],
+            "Hasta": a["patient_name"],
+            "TC": a["patient_tc"] or "",
+            "İlaç": _drugs(a),
+            "Anestezi": "Evet" if a["anesthesia"] else "Hayır",
+            "İşlem notu": a["med_note"] or "",
+            "Laboratuvar notu": a["lab_notes"] or "",
+            "Hazırlık notu": a["prep_notes"] or "",
+        }
+
+COLUMNS = ["İşlem", "Süre (dk)", "Hasta", "TC", "İlaç", "Anestezi",
+           "İşlem notu", "Laboratuvar notu", "Hazırlık notu"]
+
+# Excel bu karakterlerle başlayan hücreyi formül olarak çalıştırır (CSV injection)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def render_csv(day_iso: str, appts) -> bytes:
+    buf = io.StringIO()
+    # Türkçe Excel ';' ayırıcı bekler; BOM olmadan UTF-8 karakterler bozuk açılır
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, delimiter=";")
+    writer.writeheader()
+    writer.writerows({k: _csv_safe(v) for k, v in r.items()} for r in _rows(appts))
+    return buf.getvalue().encode("utf-8-sig")
+
+def _pdf_font():
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    if "IRSans" in pdfmetrics.getRegisteredFontNames():
+        return "IRSans"
+    for path in PDF_FONT_CANDIDATES:
+        if os.path.exists(path):
+            pdfmetrics.registerFont(TTFont("IRSans", path))
+            return "IRSans"
+    log.warning("PDF için TTF yazı tipi bulunamadı (%s); Helvetica kullanılıyor, "
+                "ş/ğ/ı/İ karakterleri görünmeyecek", ", ".join(PDF_FONT_CANDIDATES))
+    return "Helvetica"
+
+def render_pdf(day_iso: str, appts) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    font = _pdf_font()
+    cell = ParagraphStyle("cell", fontName=font, fontSize=8, leading=10)
+    title = ParagraphStyle("title", fontName=font, fontSize=13, leading=16)
+
+    day_tr = "{2}.{1}.{0}".format(*day_iso.split("-")) if day_iso.count("-") == 2 else day_iso
+    data = [[Paragraph(f"<b>{c}</b>", cell) for c in COLUMNS]]
+    for r in _rows(appts):
+        data.append([Paragraph(_escape(str(r[c])), cell) for c in COLUMNS])
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(A4), title=f"İş listesi {day_tr}",
+                            leftMargin=10 * mm, rightMargin=10 * mm,
+                            topMargin=10 * mm, bottomMargin=10 * mm)
+    widths = [38, 14, 34, 24, 26, 16, 38, 44, 44]
+    table = Table(data, colWidths=[w * mm for w in widths], repeatRows=1)
+    table.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e9ecef")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    story = [Paragraph(f"Girişimsel Radyoloji — Günlük İş Listesi — {day_tr}", title), Spacer(1, 4 * mm)]
+    story.append(table if appts else Paragraph("Bu günde randevu yok.", cell))
+    doc.build(story)
+    return buf.getvalue()
+
+def _escape(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+RENDERERS = {"csv": render_csv, "pdf": render_pdf}
+
+def _day_version(con, day_iso: str) -> int:
+    row = con.execute(q.DAY_VERSION, (day_iso,)).fetchone()
+    return row["version"] if row else 0
+
+def _snapshot(day_iso: str):
+    """(sürüm, randevular); okuma sırasında gün değişirse tekrar dener."""
+    with db.get_conn() as con:
+        while True:
+            version = _day_version(con, day_iso)
+            appts = con.execute(q.DAY_APPOINTMENTS, (day_iso,)).fetchall()
+            if _day_version(con, day_iso) == version:
+                return version, appts
+
+def export_dir() -> Path:
+    return EXPORT_DIR / (db.current_tenant() or "default")
+
+def _render(out_dir: Path, day_iso: str, fmt: str):
+    with _lock_for((str(out_dir), day_iso, fmt)):
+        version, appts = _snapshot(day_iso)
+        path = out_dir / f"{day_iso}.v{version}.{fmt}"
+        if path.exists():
+            return
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(RENDERERS[fmt](day_iso, appts))
+        try:
+            os.replace(tmp, path)  # yarım dosya hiç görünmez (çok süreçli gunicorn dahil)
+        except OSError:
+            # Windows: başka bir süreç aynı sürümü yazıp açmışsa hedef değiştirilemez
+            tmp.unlink(missing_ok=True)
+            if not path.exists():
+                raise
+        for old in out_dir.glob(f"{day_iso}.v*.{fmt}"):
+            if old == path:
+                continue
+            try:
+                old.unlink()
+            except OSError:
+                pass  # hâlâ gönderiliyor (Windows) ya da zaten silinmiş; sonraki üretimde silinir
+
+def cached_export(day_iso: str, fmt: str):
+    """Günün güncel sürümü için çıktıyı açık dosya olarak döndürür; yoksa üretir.
+
+    Dosya açıldıktan sonra daha yeni bir sürüm eskisini silse bile açık tanıtıcı
+    okunmaya devam eder; açma ile gönderme arasında FileNotFoundError oluşmaz.
+    """
+    out_dir = export_dir()
+    while True:
+        with db.get_conn() as con:
+            version = _day_version(con, day_iso)
+        path = out_dir / f"{day_iso}.v{version}.{fmt}"
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            _render(out_dir, day_iso, fmt)
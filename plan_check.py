@@ -0,0 +1,140 @@
+# Sıcak yol sorgularının indeks kullandığını denetler.
+#
+#   python plan_check.py [--rows 200000] [--out instance/query_plans] [--repeat 20]
+#
+# Geçici bir veritabanına sentetik randevular yazılır, queries.HOT_QUERIES'teki her
+# sorgu için EXPLAIN QUERY PLAN alınır ve süre ölçülür. Planlar ile süreler --out
+# klasörüne JSON/metin olarak kaydedilir. Herhangi bir sorgu appointments tablosunu
+# baştan sona tarıyorsa (SCAN appointments / SCAN a) çıkış kodu 1 olur; gerekçesiyle
+# queries.FULL_SCAN_ALLOWED'a eklenmiş sorgular raporlanır ama başarısız sayılmaz.
+import argparse
+import json
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import db
+import queries
+
+# SQLite < 3.36 biçimi: "SCAN TABLE appointments AS a"; yenisi yalnızca takma adı yazar: "SCAN a"
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# SQL'deki appointments referansları ve takma adları (FROM appointments ap / AS ap)
+_TABLE_REF_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+appointments\b"
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|ORDER|GROUP|LIMIT|LEFT|INNER|CROSS|SET|VALUES|USING)\b)(\w+))?",
+    re.IGNORECASE)
+
+def appointment_names(sql: str) -> set:
+    """Plan satırlarında appointments tablosunu gösterebilecek adlar (tablo adı + takma adlar)."""
+    return {"appointments"} | {alias for alias in _TABLE_REF_RE.findall(sql) if alias}
+
+def full_scans(plan, sql: str):
+    names = appointment_names(sql)
+    return [d for d in plan if (m := SCAN_RE.match(d)) and m.group(1) in names]
+
+def build_synthetic_db(path: Path, rows: int, seed: int = 1):
+    con = sqlite3.connect(path)
+    con.row_factory = sqlite3.Row
+    db._apply_schema(con)
+    db._seed(con, db.SEED_PROCS)
+    proc_ids = [r["id"] for r in con.execute("SELECT id FROM procedure_types")]
+    rnd = random.Random(seed)
+    start = date(2023, 1, 1)
+
+    def gen():
+        for i in range(rows):
+            d = start + timedelta(days=rnd.randrange(3 * 365))
+            yield (f"Hasta {i}", f"{rnd.randrange(10**10, 10**11)}", rnd.choice(proc_ids),
+                   rnd.choice((30, 45, 60, 90, 120)), d.isoformat(),
+                   rnd.random() < 0.2, rnd.random() < 0.3, rnd.random() < 0.15,
+                   None, None, None, '{"checked": []}', "dr", None)
+
+    with con:
+        con.executemany(queries.INSERT_APPOINTMENT, gen())
+    return con
+
+def explain(con, sql, params):
+    return [r["detail"] for r in con.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+def time_query(con, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        if sql.lstrip().upper().startswith("DELETE"):
+            con.execute("SAVEPOINT plan_check")
+            con.execute(sql, params)
+            con.execute("ROLLBACK TO plan_check")
+            con.execute("RELEASE plan_check")
+        else:
+            con.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 3)
+
+def run(rows: int, out_dir: Path, repeat: int):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "sqlite_version": sqlite3.sqlite_version,
+        "rows": rows,
+        "queries": [],
+    }
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        con = build_synthetic_db(Path(tmp) / "plan_check.db", rows)
+        con.isolation_level = None  # SAVEPOINT'leri elle yönetiyoruz
+        try:
+            for name, sql, params in queries.HOT_QUERIES:
+                plan = explain(con, sql, params)
+                scans = full_scans(plan, sql)
+                allowed = queries.FULL_SCAN_ALLOWED.get(name)
+                if scans and not allowed:
+                    failures.append(name)
+                report["queries"].append({
+                    "name": name,
+                    "sql": " ".join(sql.split()),
+                    "plan": plan,
+                    "full_scan": bool(scans),
+                    "allowed_reason": allowed if scans else None,
+                    "median_ms": time_query(con, sql, params, repeat),
+                })
+        finally:
+            con.close()
+    report["failures"] = failures
+
+    (out_dir / "query_plans.json").write_text(
+        json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    lines = [f"# {report['generated_at']}  sqlite {report['sqlite_version']}  rows={rows}"]
+    for item in report["queries"]:
+        flag = ("allowed" if item["allowed_reason"] else "FULL SCAN") if item["full_scan"] else "ok"
+        lines.append(f"\n[{flag}] {item['name']}  median={item['median_ms']} ms")
+        lines.extend(f"    {d}" for d in item["plan"])
+        if item["allowed_reason"]:
+            lines.append(f"    izin gerekçesi: {item['allowed_reason']}")
+    (out_dir / "query_plans.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return report
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sıcak yol sorguları için EXPLAIN QUERY PLAN denetimi")
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--out", type=Path, default=db.INSTANCE_DIR / "query_plans")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    report = run(args.rows, args.out, args.repeat)
+    for item in report["queries"]:
+        flag = ("allowed" if item["allowed_reason"] else "FULL SCAN") if item["full_scan"] else "ok"
+        print(f"{flag:9} {item['name']:16} {item['median_ms']:>8} ms  {' | '.join(item['plan'])}")
+    print(f"Planlar: {args.out}")
+    if report["failures"]:
+        print("Tam tablo taraması: " + ", ".join(report["failures"]), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# İstek bazında isteğe bağlı profil çıkarma (servisi yeniden başlatmadan).
+#
+#   Admin:     X-Profile: 1 başlığı ya da ?_profile=1  -> cProfile (.prof) + yığın örnekleme (.collapsed)
+#   Örnekleme: IR_PROFILE_SAMPLE_RATE=0.01            -> isteklerin %1'i, yalnızca yığın örnekleme
+#
+# Çıktılar instance/profiles altına yazılır; her istek index.jsonl'e uç nokta ve süre ile
+# eklenir (sorgu dizesi yazılmaz: ?tc= gibi hasta verisi içerebilir). En fazla
+# IR_PROFILE_MAX_FILES (varsayılan 200) profil tutulur, eskiler silinir. .collapsed dosyaları flamegraph.pl ya da speedscope.app ile açılır,
+# .prof dosyaları `python -m pstats` / snakeviz ile.
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, request
+
+import db
+
+PROFILE_DIR = db.INSTANCE_DIR / "profiles"
+SAMPLE_INTERVAL = 0.002  # sn; örnekleyici thread'in uyku aralığı
+EXCLUDED_ENDPOINTS = {"static"}
+INDEX_MAX_BYTES = 5 * 1024 * 1024  # aşılınca index.jsonl -> index.jsonl.1
+
+# Python 3.12+ aynı anda tek cProfile'a izin verir; eşzamanlı isteklerde diğerleri yalnızca örnekler
+_cprofile_lock = threading.Lock()
+
+class StackSampler:
+    """Hedef thread'in yığınını aralıklarla örnekler (düşük ek yük, kod enstrümante edilmez)."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(parts))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _sample_rate() -> float:
+    try:
+        return float(os.environ.get("IR_PROFILE_SAMPLE_RATE", "0"))
+    except ValueError:
+        return 0.0
+
+def _max_files() -> int:
+    try:
+        return max(1, int(os.environ.get("IR_PROFILE_MAX_FILES", "200")))
+    except ValueError:
+        return 200
+
+def _prune(keep: int):
+    """En yeni ``keep`` profili (id başına .collapsed/.prof) bırakır, gerisini siler."""
+    # dosya adları zaman damgasıyla başlar; ada göre sıralama = zamana göre sıralama
+    stale = sorted(PROFILE_DIR.glob("*.collapsed"))[:-keep]
+    for collapsed in stale:
+        for p in (collapsed, collapsed.with_suffix(".prof")):
+            try:
+                p.unlink(missing_ok=True)
+            except OSError:
+                pass
+    index = PROFILE_DIR / "index.jsonl"
+    try:
+        if index.stat().st_size > INDEX_MAX_BYTES:
+            os.replace(index, index.with_name("index.jsonl.1"))
+    except OSError:
+        pass
+
+def _requested() -> bool:
+    return request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+
+def init_profiling(app, is_admin):
+    """is_admin(): oturumdaki kullanıcı admin mi (profil başlığı yalnızca admin için geçerli)."""
+
+    @app.before_request
+    def _start_profile():
+        if request.endpoint in EXCLUDED_ENDPOINTS:
+            return
+        if _requested() and is_admin():
+            mode = "full"
+        elif random.random() < _sample_rate():
+            mode = "sample"
+        else:
+            return
+        endpoint = (request.endpoint or "unknown").replace(".", "_")
+        g._profile = {
+            "id": f"{datetime.now():%Y%m%d-%H%M%S-%f}_{endpoint}",
+            "mode": mode,
+            "started": time.perf_counter(),
+            "sampler": StackSampler(threading.get_ident()),
+            "cprofile": None,
+        }
+        if mode == "full" and _cprofile_lock.acquire(blocking=False):
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+                g._profile["cprofile"] = prof
+            except ValueError:  # başka bir profil aracı etkin
+                _cprofile_lock.release()
+        g._profile["sampler"].start()
+
+    @app.after_request
+    def _tag_response(response):
+        state = g.get("_profile")
+        if state is not None:
+            response.headers["X-Profile-Id"] = state["id"]
+        return response
+
+    @app.teardown_request
+    def _finish_profile(exc):
+        state = g.pop("_profile", None)
+        if state is None:
+            return
+        prof = state["cprofile"]
+        if prof is not None:
+            prof.disable()
+            _cprofile_lock.release()
+        state["sampler"].stop()
+        elapsed_ms = (time.perf_counter() - state["started"]) * 1000
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        base = PROFILE_DIR / f"{state['id']}_{elapsed_ms:.0f}ms"
+        files = [base.with_suffix(".collapsed").name]
+        state["sampler"].write_collapsed(base.with_suffix(".collapsed"))
+        if prof is not None:
+            prof.dump_stats(base.with_suffix(".prof"))
+            files.append(base.with_suffix(".prof").name)
+        entry = {
+            "id": state["id"],
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "tenant": db.current_tenant(),
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "mode": state["mode"],
+            "elapsed_ms": round(elapsed_ms, 2),
+            "samples": sum(state["sampler"].stacks.values()),
+            "error": repr(exc) if exc else None,
+            "files": files,
+        }
+        with open(PROFILE_DIR / "index.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        _prune(_max_files())
@@ -0,0 +1,114 @@
+# Görünümlerin kullandığı SQL tek yerde; plan_check.py bunları EXPLAIN QUERY PLAN ile denetler.
+
+LIST_PROCEDURES = (
+    "SELECT id, name, default_duration_min, requirements_json "
+    "FROM procedure_types WHERE active=1 ORDER BY name"
+)
+
+DAY_APPOINTMENTS = """
+    SELECT a.id, a.patient_name, a.patient_tc, a.date, a.duration_min,
+           a.anticoagulant, a.antiplatelet, a.anesthesia,
+           a.med_note, a.lab_notes, a.prep_notes,
+           a.custom_proc_name,
+           pt.name AS proc_name
+    FROM appointments a
+    JOIN procedure_types pt ON pt.id = a.procedure_type_id
+    WHERE a.date = ?
+    ORDER BY a.id DESC
+"""
+
+DAY_VERSION = "SELECT version FROM day_versions WHERE date = ?"
+
+INSERT_APPOINTMENT = """
+    INSERT INTO appointments
+      (patient_name, patient_tc, procedure_type_id, duration_min, date,
+       anticoagulant, antiplatelet, anesthesia, med_note,
+       lab_notes, prep_notes, req_checks_json, doctor_username, custom_proc_name)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+INSERT_SERIES = """
+    INSERT INTO appointment_series (label, patient_name, patient_tc, doctor_username, created_at)
+    VALUES (?,?,?,?,?)
+"""
+
+INSERT_SERIES_APPOINTMENT = """
+    INSERT INTO appointments
+      (patient_name, patient_tc, procedure_type_id, duration_min, date,
+       anticoagulant, antiplatelet, anesthesia, med_note,
+       lab_notes, prep_notes, req_checks_json, doctor_username, custom_proc_name, series_id)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+DELETE_APPOINTMENT = "DELETE FROM appointments WHERE id = ?"
+
+APPT_PATIENT_TC = "SELECT patient_tc FROM appointments WHERE id = ?"
+
+_SEARCH_BY_TC_BASE = """
+    SELECT a.id, a.patient_name, a.patient_tc, a.date,
+           pt.name AS proc_name, a.custom_proc_name, a.anesthesia
+    FROM appointments a
+    JOIN procedure_types pt ON pt.id = a.procedure_type_id
+    WHERE {cond}
+    ORDER BY a.date DESC, a.id DESC
+"""
+
+# Tam 11 haneli TC: idx_appointments_tc üzerinden eşitlik araması (sıcak yol)
+SEARCH_BY_TC_EXACT = _SEARCH_BY_TC_BASE.format(cond="a.patient_tc = ?")
+
+# TC içinde geçen (son haneler dahil) arama. "LIKE '%..%'" indeksi kullanamaz;
+# yalnızca eksik TC girildiğinde kullanılır, FULL_SCAN_ALLOWED'a bilinçli eklendi.
+SEARCH_BY_TC = _SEARCH_BY_TC_BASE.format(cond="a.patient_tc LIKE ?")
+
+def search_by_tc(tc: str):
+    """(SQL, parametreler): tam TC indeksli eşitlikle, kısmi TC alt dize eşleşmesiyle aranır.
+
+    TC en fazla 11 hane olduğundan 11 haneli girişte iki sorgu aynı sonucu verir.
+    """
+    if len(tc) == 11 and tc.isdigit():
+        return SEARCH_BY_TC_EXACT, (tc,)
+    return SEARCH_BY_TC, (f"%{tc}%",)
+
+# fields= ile istenebilecek alanlar -> SQL ifadesi
+APPT_FIELDS = {
+    "id": "a.id",
+    "patient_name": "a.patient_name",
+    "patient_tc": "a.patient_tc",
+    "date": "a.date",
+    "duration_min": "a.duration_min",
+    "anticoagulant": "a.anticoagulant",
+    "antiplatelet": "a.antiplatelet",
+    "anesthesia": "a.anesthesia",
+    "med_note": "a.med_note",
+    "lab_notes": "a.lab_notes",
+    "prep_notes": "a.prep_notes",
+    "custom_proc_name": "a.custom_proc_name",
+    "series_id": "a.series_id",
+    "proc_name": "pt.name AS proc_name",
+    "req_checks": "a.req_checks_json",  # ham JSON yerine çözümlenmiş liste döner
+}
+
+def appt_detail_sql(fields) -> str:
+    cols = ", ".join(APPT_FIELDS[f] for f in fields)
+    join = " JOIN procedure_types pt ON pt.id = a.procedure_type_id" if "proc_name" in fields else ""
+    return f"SELECT {cols} FROM appointments a{join} WHERE a.id = ?"
+
+# Sıcak yol sorguları: (ad, SQL, örnek parametreler). plan_check.py hiçbirinin
+# appointments tablosunu baştan sona taramadığını doğrular.
+HOT_QUERIES = [
+    ("agenda_day", DAY_APPOINTMENTS, ("2025-03-14",)),
+    ("day_version", DAY_VERSION, ("2025-03-14",)),
+    ("search_tc_exact", SEARCH_BY_TC_EXACT, ("12345678901",)),
+    ("search_tc", SEARCH_BY_TC, ("%1234%",)),
+    ("appt_detail", appt_detail_sql(list(APPT_FIELDS)), (42,)),
+    ("appt_detail_min", appt_detail_sql(["id", "patient_name"]), (42,)),
+    ("delete_appt", DELETE_APPOINTMENT, (42,)),
+    ("appt_patient_tc", APPT_PATIENT_TC, (42,)),
+]
+
+# Tam tarama kabul edilen sorgular -> gerekçe (plan_check.py bunları başarısız saymaz,
+# gerekçeyi raporlara yazar). Yeni bir giriş ürün onayı gerektirir.
+FULL_SCAN_ALLOWED = {
+    "search_tc": "Eksik TC ile (örn. son haneler) arama istenen davranış; "
+                 "alt dize eşleşmesi B-tree indeksiyle yapılamaz.",
+}
@@ -0,0 +1,128 @@
+# Bağlı randevu serileri (TARE MAA -> TARE, kademeli PTA, tekrar TACE).
+#
+# Serinin tüm adımları tek seferde doğrulanır ve tek transaction içinde yazılır;
+# herhangi bir adım hatalıysa hiçbir randevu oluşmaz.
+import json
+from datetime import datetime
+
+import queries as q
+
+MAX_STEPS = 20
+
+# JSON gövdesinden gelen değerler türüyle birlikte denetlenir: liste/nesne metne,
+# true/false sayıya çevrilmez; her biri alan adıyla hata olarak raporlanır.
+
+def _flag(v, label, errors) -> int:
+    if v is None or isinstance(v, bool):
+        return int(bool(v))
+    if isinstance(v, (int, float)):
+        return 1 if v else 0
+    if isinstance(v, str):
+        return 1 if v.strip().lower() in ("1", "on", "true", "evet") else 0
+    errors.append(f"{label} evet/hayır değeri olmalıdır.")
+    return 0
+
+def _text(v, label, errors) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        return v.strip()
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return str(v)
+    errors.append(f"{label} metin olmalıdır.")
+    return ""
+
+def _int(v, label, errors):
+    """Tam sayı ya da rakamlardan oluşan metin; boşsa None."""
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return None
+    if isinstance(v, bool):
+        errors.append(f"{label} sayı olmalıdır.")
+        return None
+    if isinstance(v, int):
+        return v
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, str):
+        try:
+            return int(v.strip())
+        except ValueError:
+            pass
+    errors.append(f"{label} sayı olmalıdır.")
+    return None
+
+def validate_series(payload: dict, procs) -> tuple:
+    """payload -> (temiz seri, hatalar). procs: aktif işlem türleri (katalog)."""
+    errors = []
+    catalog = {p["id"]: p for p in procs}
+    series = {
+        "label": _text(payload.get("label"), "Seri adı", errors),
+        "patient_name": _text(payload.get("patient_name"), "Hasta adı", errors),
+        "patient_tc": _text(payload.get("patient_tc"), "TC", errors),
+        "anticoagulant": _flag(payload.get("anticoagulant"), "Antikoagülan", errors),
+        "antiplatelet": _flag(payload.get("antiplatelet"), "Antiagregan", errors),
+        "med_note": _text(payload.get("med_note"), "İşlem notu", errors),
+        "lab_notes": _text(payload.get("lab_notes"), "Laboratuvar notu", errors),
+        "prep_notes": _text(payload.get("prep_notes"), "Hazırlık notu", errors),
+        "steps": [],
+    }
+    if not series["patient_name"] and "Hasta adı metin olmalıdır." not in errors:
+        errors.append("Hasta adı zorunludur.")
+    tc = series["patient_tc"]
+    if tc and (not tc.isdigit() or len(tc) > 11):
+        errors.append("TC en fazla 11 haneli rakam olmalıdır.")
+
+    steps = payload.get("steps") or []
+    if not isinstance(steps, list) or not steps:
+        errors.append("Seride en az bir adım olmalıdır.")
+        steps = []
+    elif len(steps) > MAX_STEPS:
+        errors.append(f"Bir seride en fazla {MAX_STEPS} adım olabilir.")
+        steps = []
+
+    for i, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            errors.append(f"{i}. adım geçersiz.")
+            continue
+        n_errors = len(errors)
+        proc_id = _int(step.get("procedure_type_id"), f"{i}. adım: işlem türü", errors)
+        proc = catalog.get(proc_id)
+        if proc is None and len(errors) == n_errors:
+            errors.append(f"{i}. adım: işlem türü geçersiz.")
+        date_iso = _text(step.get("date"), f"{i}. adım: tarih", errors)
+        try:
+            # agenda/export "date = ?" ile eşleşsin diye sıfır dolgulu ISO biçimine çevrilir
+            date_iso = datetime.strptime(date_iso, "%Y-%m-%d").date().isoformat()
+        except ValueError:
+            errors.append(f"{i}. adım: tarih YYYY-AA-GG olmalıdır.")
+        n_errors = len(errors)
+        duration = _int(step.get("duration_min"), f"{i}. adım: süre", errors)
+        if duration is None and len(errors) == n_errors:
+            duration = proc["default_duration_min"] if proc else 0
+        if len(errors) == n_errors and duration <= 0:
+            errors.append(f"{i}. adım: süre pozitif olmalıdır.")
+        series["steps"].append({
+            "procedure_type_id": proc_id,
+            "date": date_iso,
+            "duration_min": duration,
+            "anesthesia": _flag(step.get("anesthesia"), f"{i}. adım: anestezi", errors),
+            "custom_proc_name": _text(step.get("custom_proc_name"), f"{i}. adım: işlem adı", errors),
+        })
+    return series, errors
+
+def create_series(con, series: dict, username: str) -> tuple:
+    """Doğrulanmış seriyi tek transaction'da yazar; (series_id, randevu id'leri) döndürür."""
+    req_json = json.dumps({"checked": []}, ensure_ascii=False)
+    with con:  # hata olursa tamamı geri alınır
+        series_id = con.execute(q.INSERT_SERIES, (
+            series["label"] or None, series["patient_name"], series["patient_tc"] or None,
+            username, datetime.now().isoformat(timespec="seconds"))).lastrowid
+        ids = []
+        for step in series["steps"]:
+            ids.append(con.execute(q.INSERT_SERIES_APPOINTMENT, (
+                series["patient_name"], series["patient_tc"], step["procedure_type_id"],
+                step["duration_min"], step["date"],
+                series["anticoagulant"], series["antiplatelet"], step["anesthesia"],
+                series["med_note"], series["lab_notes"] or None, series["prep_notes"] or None,
+                req_json, username, step["custom_proc_name"] or None, series_id)).lastrowid)
+    return series_id, ids
@@ -0,0 +1,127 @@
+# Çoklu bölüm (girişimsel radyoloji, kardiyoloji kateter lab, nöro-IR) yönlendirmesi.
+#
+# IR_TENANTS="ir,kardiyo,noro" tanımlıysa mod açılır. IR_TENANT_MODE:
+#   prefix    -> /t/<tenant>/agenda  (varsayılan; önek SCRIPT_NAME'e taşınır, url_for önekli üretir)
+#   subdomain -> kardiyo.randevu.local/agenda  (IR_TENANT_BASE_DOMAIN=randevu.local zorunlu)
+# Önek/alt alan adı olmayan istekler eski tek veritabanına (db.DB_PATH) gider; alt alan
+# modunda temel alan adıyla bitmeyen host'lar (IP adresi, sunucunun kendi adı) da öyle.
+import ipaddress
+import os
+import threading
+import time
+
+import db
+
+TENANT_PREFIX = "/t/"
+
+def configured_tenants():
+    raw = os.environ.get("IR_TENANTS", "")
+    return {t.strip().lower() for t in raw.split(",") if t.strip()}
+
+class TenantMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def record(self, tenant, status: int, elapsed_ms: float):
+        with self._lock:
+            m = self._data.setdefault(tenant, {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            m["requests"] += 1
+            if status >= 500:
+                m["errors"] += 1
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            data = {t: dict(m) for t, m in self._data.items()}
+        cached = set(db.tenant_cache.cached_tenants())
+        for tenant, m in data.items():
+            m["avg_ms"] = round(m["total_ms"] / m["requests"], 2) if m["requests"] else 0.0
+            m["total_ms"] = round(m["total_ms"], 2)
+            m["max_ms"] = round(m["max_ms"], 2)
+            m["catalog_cache"] = dict(db.tenant_cache.stats.get(tenant, {}))
+            m["cached"] = tenant in cached
+        return data
+
+metrics = TenantMetrics()
+
+class TenantMiddleware:
+    """İsteği tenant'a çözer, db.current_tenant()'ı ayarlar ve süreyi ölçer."""
+
+    def __init__(self, wsgi_app, tenants, mode: str = "prefix", base_domain: str = ""):
+        self.wsgi_app = wsgi_app
+        self.tenants = tenants
+        self.mode = mode
+        self.base_domain = base_domain.strip(".").lower()
+
+    def _resolve(self, environ):
+        """(tenant, bilinmeyen_mi) döndürür; tenant None ise varsayılan veritabanı."""
+        if self.mode == "subdomain":
+            return self._resolve_host(environ.get("HTTP_HOST") or environ.get("SERVER_NAME") or "")
+        path = environ.get("PATH_INFO", "")
+        if not path.startswith(TENANT_PREFIX):
+            return None, False
+        name, _, rest = path[len(TENANT_PREFIX):].partition("/")
+        name = name.lower()
+        if name not in self.tenants:
+            return None, True
+        environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + TENANT_PREFIX + name
+        environ["PATH_INFO"] = "/" + rest
+        return name, False
+
+    def _resolve_host(self, host: str):
+        host = host.strip().lower().rstrip(".")
+        if host.startswith("["):  # [::1]:5000
+            return None, False
+        host = host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+        try:
+            ipaddress.ip_address(host)
+            return None, False
+        except ValueError:
+            pass
+        suffix = "." + self.base_domain
+        if not host.endswith(suffix):
+            return None, False
+        name = host[:-len(suffix)]
+        if "." in name:  # a.b.randevu.local: bölüm alt alanı değil
+            return None, False
+        return (name, False) if name in self.tenants else (None, True)
+
+    def __call__(self, environ, start_response):
+        tenant, unknown = self._resolve(environ)
+        if unknown:
+            start_response("404 NOT FOUND", [("Content-Type", "text/plain; charset=utf-8")])
+            return ["Bilinmeyen bölüm".encode("utf-8")]
+        environ["ir.tenant"] = tenant
+        status_code = [500]
+
+        def _start_response(status, headers, exc_info=None):
+            status_code[0] = int(status.split(" ", 1)[0])
+            return start_response(status, headers, exc_info)
+
+        token = db.set_tenant(tenant)
+        conns_token = db.begin_request()
+        started = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            db.end_request(conns_token)
+            db.reset_tenant(token)
+            metrics.record(tenant or "default", status_code[0], (time.perf_counter() - started) * 1000)
+
+def init_tenants(app):
+    tenants = configured_tenants()
+    if not tenants:
+        return False
+    invalid = [t for t in tenants if not db.TENANT_NAME_RE.match(t)]
+    if invalid:
+        raise ValueError(f"IR_TENANTS içinde geçersiz ad(lar): {', '.join(sorted(invalid))}")
+    mode = os.environ.get("IR_TENANT_MODE", "prefix")
+    if mode not in ("prefix", "subdomain"):
+        raise ValueError(f"IR_TENANT_MODE 'prefix' ya da 'subdomain' olmalı, gelen: {mode!r}")
+    base_domain = os.environ.get("IR_TENANT_BASE_DOMAIN", "")
+    if mode == "subdomain" and not base_domain.strip("."):
+        raise ValueError("IR_TENANT_MODE=subdomain için IR_TENANT_BASE_DOMAIN (örn. randevu.local) gerekli")
+    app.wsgi_app = TenantMiddleware(app.wsgi_app, tenants, mode, base_domain)
+    return True
@@ -0,0 +1,46 @@
+# Testler geçici bir instance klasörüyle, iki bölüm (ir, kardiyo) açık çalışır.
+# db yolları app içe aktarılmadan önce değiştirilmelidir (app import'ta init_db çağırır).
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ["IR_TENANTS"] = "ir,kardiyo"
+os.environ.setdefault("IR_TENANT_MODE", "prefix")
+
+import db  # noqa: E402
+
+_instance = Path(tempfile.mkdtemp(prefix="ir_test_"))
+db.INSTANCE_DIR = _instance
+db.DB_PATH = _instance / "app.db"
+db.TENANT_DIR = _instance / "tenants"
+
+import app as app_module  # noqa: E402
+
+@pytest.fixture
+def app():
+    return app_module.app
+
+@pytest.fixture
+def client(app):
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["user"] = "dr"
+    return c
+
+@pytest.fixture
+def tenant():
+    """Testin içinde db.current_tenant()'ı geçici olarak ayarlar."""
+    tokens = []
+
+    def _set(name):
+        tokens.append(db.set_tenant(name))
+
+    yield _set
+    for token in reversed(tokens):
+        db.reset_tenant(token)
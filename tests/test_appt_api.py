@@ -0,0 +1,37 @@
+import queries as q
+
+def _book(client):
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": "Alan", "patient_tc": "44444444444", "med_note": "not",
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-05"}],
+    })
+    return r.json["ids"][0]
+
+def test_appt_detail_sql_selects_only_requested_columns():
+    sql = q.appt_detail_sql(["id", "patient_name"])
+    assert sql.startswith("SELECT a.id, a.patient_name FROM appointments a")
+    assert "JOIN" not in sql and "med_note" not in sql
+
+def test_proc_name_alone_adds_the_join():
+    sql = q.appt_detail_sql(["id", "proc_name"])
+    assert "JOIN procedure_types pt" in sql
+    assert "JOIN" not in q.appt_detail_sql(["id", "req_checks"])
+
+def test_fields_trim_the_payload(client):
+    appt_id = _book(client)
+    body = client.get(f"/t/ir/api/appt/{appt_id}?fields=patient_name,proc_name").json
+    assert body == {"id": appt_id, "patient_name": "Alan", "proc_name": body["proc_name"]}
+    assert body["proc_name"]
+
+def test_full_payload_has_parsed_checks_but_not_raw_json(client):
+    appt_id = _book(client)
+    body = client.get(f"/t/ir/api/appt/{appt_id}").json
+    assert set(body) == set(q.APPT_FIELDS)
+    assert body["req_checks"] == []
+    assert "req_checks_json" not in body
+
+def test_unknown_fields_are_rejected(client):
+    appt_id = _book(client)
+    r = client.get(f"/t/ir/api/appt/{appt_id}?fields=patient_name,req_checks_json,bogus")
+    assert r.status_code == 400
+    assert r.json == {"error": "unknown fields", "fields": ["req_checks_json", "bogus"]}
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import app as app_module
+from audit import AuditLog
+
+def test_close_flushes_pending_events(tmp_path):
+    log = AuditLog(tmp_path / "audit.db", flush_interval=60, batch_size=1000)
+    for i in range(250):
+        log.log("view", username="dr", appt_id=i)
+    log.close()
+    assert log.stats["written"] == 250
+    assert len(log.query(limit=1000)) == 250
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    log = AuditLog(tmp_path / "audit.db", maxsize=2, batch_size=1, flush_interval=60)
+    release = threading.Event()
+    real_write = log._write
+    monkeypatch.setattr(log, "_write", lambda con, batch: (release.wait(5), real_write(con, batch)))
+    log.log("view", appt_id=0)
+    deadline = time.monotonic() + 5
+    while not log._queue.empty() and time.monotonic() < deadline:  # yazıcı ilk olayı alıp bekliyor
+        time.sleep(0.001)
+    for i in range(1, 5):
+        log.log("view", appt_id=i)
+    assert log.stats["dropped"] == 2
+    release.set()
+    log.close()
+    assert log.stats["written"] == 3
+
+def test_audit_endpoint_is_scoped_to_tenant(client):
+    tc = "22222222222"
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": "Gizli", "patient_tc": tc,
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-03"}],
+    })
+    client.get(f"/t/ir/api/appt/{r.json['ids'][0]}")
+    app_module.audit_log.close()  # bekleyen olayları diske yaz
+
+    ir_events = client.get(f"/t/ir/api/audit?tc={tc}").json["events"]
+    assert {e["action"] for e in ir_events} >= {"create", "view"}
+    assert client.get(f"/t/kardiyo/api/audit?tc={tc}").json["events"] == []
+    assert client.get(f"/api/audit?tc={tc}").json["events"] == []
+
+def test_audit_endpoint_requires_admin(app):
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["user"] = "hemsire"
+    assert c.get("/t/ir/api/audit").status_code == 403
+
+def test_projected_view_and_series_create_are_audited(client):
+    tc = "33333333333"
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": "Seri", "patient_tc": tc,
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-04"},
+                  {"procedure_type_id": 1, "date": "2026-11-18"}],
+    })
+    first, second = r.json["ids"]
+    body = client.get(f"/t/ir/api/appt/{second}?fields=patient_name").json
+    assert "patient_tc" not in body
+    app_module.audit_log.close()
+
+    events = client.get(f"/t/ir/api/audit?appt_id={second}").json["events"]
+    assert {(e["action"], e["patient_tc"]) for e in events} == {("create", tc), ("view", tc)}
+    created = client.get(f"/t/ir/api/audit?appt_id={first}&action=create").json["events"]
+    assert created[0]["detail"] == f"series={r.json['series_id']}"
@@ -0,0 +1,16 @@
+import pytest
+
+@pytest.mark.parametrize("header, gzipped", [
+    ("gzip", True),
+    ("*;q=0, gzip", True),
+    ("gzip;q=0.5, *;q=0", True),
+    ("gzip;q=0", False),
+    ("br", False),
+    ("", False),
+])
+def test_gzip_negotiation(app, client, monkeypatch, header, gzipped):
+    monkeypatch.setitem(app.config, "GZIP_MIN_SIZE", 1)
+    r = client.get("/api/tenants/metrics", headers={"Accept-Encoding": header})
+    assert r.status_code == 200
+    assert (r.headers.get("Content-Encoding") == "gzip") is gzipped
+    assert "Accept-Encoding" in r.headers.get("Vary", "")
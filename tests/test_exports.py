@@ -0,0 +1,48 @@
+import csv
+import io
+
+import db
+import exports
+
+def test_export_date_is_normalized(client):
+    r = client.get("/t/ir/agenda/export.csv?date=2025-3-14")
+    assert r.status_code == 200
+    assert "is_listesi_2025-03-14.csv" in r.headers["Content-Disposition"]
+    names = [p.name for p in (exports.EXPORT_DIR / "ir").glob("2025-*")]
+    assert names and all(n.startswith("2025-03-14.") for n in names)
+
+def test_open_export_survives_newer_version(client, tenant):
+    tenant("ir")
+    fh = exports.cached_export("2026-12-01", "csv")
+    try:
+        with db.get_conn() as con:
+            con.execute("INSERT INTO appointments (patient_name, procedure_type_id, duration_min, "
+                        "date, doctor_username) VALUES ('Yeni', 1, 30, '2026-12-01', 'dr')")
+        newer = exports.cached_export("2026-12-01", "csv")
+        newer.close()
+        assert newer.name != fh.name
+        assert fh.read().decode("utf-8-sig").startswith("İşlem;")  # eski sürüm hâlâ okunur
+    finally:
+        fh.close()
+
+def test_csv_neutralizes_formula_cells(tenant):
+    tenant("ir")
+    with db.get_conn() as con:
+        con.execute("INSERT INTO appointments (patient_name, procedure_type_id, duration_min, date, "
+                    "doctor_username, med_note, lab_notes, prep_notes, custom_proc_name) "
+                    "VALUES ('=HYPERLINK(\"x\")', 1, 30, '2026-12-09', 'dr', '+1', '-2', '@SUM(A1)', 'Normal')")
+    fh = exports.cached_export("2026-12-09", "csv")
+    with fh:
+        rows = list(csv.DictReader(io.StringIO(fh.read().decode("utf-8-sig")), delimiter=";"))
+    row = rows[0]
+    assert row["Hasta"] == "'=HYPERLINK(\"x\")"
+    assert (row["İşlem notu"], row["Laboratuvar notu"], row["Hazırlık notu"]) == ("'+1", "'-2", "'@SUM(A1)")
+    assert row["İşlem"] == "Normal" and row["Süre (dk)"] == "30"
+
+def test_missing_pdf_font_is_logged(monkeypatch, caplog):
+    from reportlab.pdfbase import pdfmetrics
+    monkeypatch.setattr(exports, "PDF_FONT_CANDIDATES", ["/yok/font.ttf"])
+    monkeypatch.setattr(pdfmetrics, "getRegisteredFontNames", lambda: [])
+    with caplog.at_level("WARNING", logger="exports"):
+        assert exports._pdf_font() == "Helvetica"
+    assert "TTF" in caplog.text
@@ -0,0 +1,21 @@
+import json
+
+import profiling
+
+def test_profiles_are_pruned_and_paths_have_no_query(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setenv("IR_PROFILE_MAX_FILES", "2")
+    for _ in range(4):
+        r = client.get("/t/ir/api/appt/1?fields=patient_tc&_profile=1")
+        assert "X-Profile-Id" in r.headers
+    assert len(list(tmp_path.glob("*.collapsed"))) == 2
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+    entries = [json.loads(line) for line in (tmp_path / "index.jsonl").read_text().splitlines()]
+    assert entries and all("?" not in e["path"] for e in entries)
+
+def test_static_is_never_sampled(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setenv("IR_PROFILE_SAMPLE_RATE", "1")
+    r = client.get("/static/style.css")
+    assert "X-Profile-Id" not in r.headers
+    assert not (tmp_path / "index.jsonl").exists()
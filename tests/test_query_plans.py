@@ -0,0 +1,40 @@
+import plan_check
+import queries
+
+def test_hot_queries_use_indexes(tmp_path):
+    report = plan_check.run(2000, tmp_path, repeat=1)
+    assert report["failures"] == []
+    assert (tmp_path / "query_plans.json").exists()
+    search = next(q for q in report["queries"] if q["name"] == "search_tc")
+    assert search["allowed_reason"] == queries.FULL_SCAN_ALLOWED["search_tc"]
+
+def test_unlisted_full_scan_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(queries, "HOT_QUERIES", [
+        ("by_note", "SELECT id FROM appointments a WHERE a.med_note = ?", ("x",)),
+    ])
+    assert plan_check.run(200, tmp_path, repeat=1)["failures"] == ["by_note"]
+
+def test_full_scan_detection_handles_formats_and_aliases():
+    sql = "SELECT ap.id FROM appointments ap JOIN procedure_types pt ON pt.id = ap.procedure_type_id"
+    assert plan_check.appointment_names(sql) == {"appointments", "ap"}
+    assert plan_check.full_scans(["SCAN TABLE appointments AS ap"], sql)
+    assert plan_check.full_scans(["SCAN ap USING COVERING INDEX idx_appointments_tc"], sql)
+    assert not plan_check.full_scans(["SCAN pt", "SCAN TABLE procedure_types"], sql)
+    assert not plan_check.full_scans(["SEARCH ap USING INDEX idx_appointments_date (date=?)"], sql)
+    assert plan_check.appointment_names("DELETE FROM appointments WHERE id = ?") == {"appointments"}
+
+def test_other_alias_full_scan_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(queries, "HOT_QUERIES", [
+        ("aliased", "SELECT ap.id FROM appointments AS ap WHERE ap.med_note = ?", ("x",)),
+    ])
+    assert plan_check.run(200, tmp_path, repeat=1)["failures"] == ["aliased"]
+
+def test_exact_tc_search_uses_index(tmp_path):
+    report = plan_check.run(2000, tmp_path, repeat=1)
+    exact = next(q for q in report["queries"] if q["name"] == "search_tc_exact")
+    assert not exact["full_scan"]
+    assert any("idx_appointments_tc" in d for d in exact["plan"])
+
+def test_search_by_tc_picks_exact_query_for_full_tc():
+    assert queries.search_by_tc("12345678901") == (queries.SEARCH_BY_TC_EXACT, ("12345678901",))
+    assert queries.search_by_tc("8901") == (queries.SEARCH_BY_TC, ("%8901%",))
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+import db
+import series
+
+def _count(con, table):
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+def _procs(con):
+    return con.execute("SELECT id, name, default_duration_min FROM procedure_types").fetchall()
+
+def test_validation_error_creates_nothing(client, tenant):
+    tenant("ir")
+    con = db.get_conn()
+    before = _count(con, "appointments"), _count(con, "appointment_series")
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": "Ali",
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-01"},
+                  {"procedure_type_id": 99999, "date": "2026-11-15"}],
+    })
+    assert r.status_code == 400
+    assert "2. adım: işlem türü geçersiz." in r.json["errors"]
+    assert (_count(con, "appointments"), _count(con, "appointment_series")) == before
+
+def test_failure_mid_insert_rolls_back_whole_series(tenant):
+    tenant("ir")
+    con = db.get_conn()
+    data, errors = series.validate_series({
+        "patient_name": "Ali",
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-01"},
+                  {"procedure_type_id": 1, "date": "2026-11-15"}],
+    }, _procs(con))
+    assert not errors
+    data["steps"][1]["procedure_type_id"] = None  # NOT NULL ihlali: ikinci satırda patlar
+    before = _count(con, "appointments"), _count(con, "appointment_series")
+    with pytest.raises(sqlite3.IntegrityError):
+        series.create_series(con, data, "dr")
+    assert (_count(con, "appointments"), _count(con, "appointment_series")) == before
+
+def test_dates_are_normalized_to_iso(client):
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": "Veli", "steps": [{"procedure_type_id": 1, "date": "2025-3-4"}],
+    })
+    assert r.status_code == 201
+    appt_id = r.json["ids"][0]
+    assert client.get(f"/t/ir/api/appt/{appt_id}?fields=date").json["date"] == "2025-03-04"
+
+def test_non_scalar_and_bool_values_are_rejected(client):
+    r = client.post("/t/ir/api/series", json={
+        "patient_name": ["x"], "med_note": {"a": 1},
+        "steps": [{"procedure_type_id": True, "date": "2026-11-01", "duration_min": True},
+                  {"procedure_type_id": 1, "date": ["2026-11-02"], "duration_min": "abc"}],
+    })
+    assert r.status_code == 400
+    errors = r.json["errors"]
+    for expected in ("Hasta adı metin olmalıdır.", "İşlem notu metin olmalıdır.",
+                     "1. adım: işlem türü sayı olmalıdır.", "1. adım: süre sayı olmalıdır.",
+                     "2. adım: tarih metin olmalıdır.", "2. adım: süre sayı olmalıdır."):
+        assert expected in errors
+
+def test_numeric_strings_and_defaults_are_accepted(tenant):
+    tenant("ir")
+    con = db.get_conn()
+    procs = _procs(con)
+    data, errors = series.validate_series({
+        "patient_name": "Ali", "patient_tc": 12345678901, "anticoagulant": True,
+        "steps": [{"procedure_type_id": str(procs[0]["id"]), "date": "2026-11-01"},
+                  {"procedure_type_id": procs[0]["id"], "date": "2026-11-02", "duration_min": "45"}],
+    }, procs)
+    assert errors == []
+    assert data["patient_tc"] == "12345678901" and data["anticoagulant"] == 1
+    assert [s["duration_min"] for s in data["steps"]] == [procs[0]["default_duration_min"], 45]
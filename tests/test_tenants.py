@@ -0,0 +1,124 @@
+import threading
+
+import db
+
+def _book(client, prefix, patient="Ayşe", tc="11111111111"):
+    r = client.post(f"{prefix}/api/series", json={
+        "patient_name": patient, "patient_tc": tc,
+        "steps": [{"procedure_type_id": 1, "date": "2026-11-02"}],
+    })
+    assert r.status_code == 201, r.json
+    return r.json["ids"][0]
+
+def test_appt_detail_is_isolated_per_tenant(client):
+    appt_id = _book(client, "/t/ir", patient="Sadece IR")
+    assert client.get(f"/t/ir/api/appt/{appt_id}?fields=patient_name").json["patient_name"] == "Sadece IR"
+    r = client.get(f"/t/kardiyo/api/appt/{appt_id}?fields=patient_name")
+    assert r.status_code == 404 or r.json["patient_name"] != "Sadece IR"
+
+def test_unknown_tenant_is_404(client):
+    assert client.get("/t/yok/api/appt/1").status_code == 404
+
+def test_connection_survives_eviction_of_its_tenant(tenant, monkeypatch):
+    monkeypatch.setattr(db.tenant_cache, "maxsize", 1)
+    db.tenant_cache.clear()
+    tenant("ir")
+    token = db.begin_request()
+    try:
+        con = db.get_conn()
+        # başka bir istek kardiyo'yu açar, ir önbellekten düşer
+        t = threading.Thread(target=lambda: db.tenant_cache.entry("kardiyo"))
+        t.start()
+        t.join()
+        assert "ir" not in db.tenant_cache.cached_tenants()
+        assert con.execute("SELECT COUNT(*) FROM procedure_types").fetchone()[0] > 0
+    finally:
+        db.end_request(token)
+
+def test_requests_do_not_share_a_transaction(tenant):
+    tenant("ir")
+    token = db.begin_request()
+    try:
+        mine = db.get_conn()
+        mine.execute("INSERT INTO appointment_series (patient_name, doctor_username, created_at) "
+                     "VALUES ('yarım', 'dr', 'x')")
+        other = {}
+
+        def other_request():
+            t_tok = db.set_tenant("ir")
+            c_tok = db.begin_request()
+            try:
+                con = db.get_conn()
+                other["same"] = con is mine
+                con.rollback()
+            finally:
+                db.end_request(c_tok)
+                db.reset_tenant(t_tok)
+
+        t = threading.Thread(target=other_request)
+        t.start()
+        t.join()
+        assert other["same"] is False
+        assert mine.in_transaction
+        mine.rollback()
+    finally:
+        db.end_request(token)
+
+def _subdomain_client(app):
+    from werkzeug.test import Client
+    from tenants import TenantMiddleware
+    inner = app.wsgi_app.wsgi_app  # prefix modundaki ara katmanın altındaki Flask uygulaması
+    return Client(TenantMiddleware(inner, {"ir", "kardiyo"}, "subdomain", "randevu.local"))
+
+def test_subdomain_mode_routes_by_label_before_base_domain(app):
+    mw = _subdomain_client(app).application
+    assert mw._resolve_host("kardiyo.randevu.local:5000") == ("kardiyo", False)
+    assert mw._resolve_host("yok.randevu.local") == (None, True)
+    for host in ("10.0.0.5:5000", "[::1]:5000", "randevu.local", "randevu.hastane.local",
+                 "a.ir.randevu.local", "localhost"):
+        assert mw._resolve_host(host) == (None, False), host
+
+def test_subdomain_mode_requests(app):
+    c = _subdomain_client(app)
+    for host in ("10.0.0.5:5000", "randevu.hastane.local", "ir.randevu.local"):
+        r = c.get("/login", headers={"Host": host})
+        assert r.status_code != 404, host
+    assert c.get("/login", headers={"Host": "yok.randevu.local"}).status_code == 404
+
+def test_preparing_one_tenant_does_not_block_others(monkeypatch):
+    cache = db.TenantCache(maxsize=4)
+    started, release = threading.Event(), threading.Event()
+    real_prepare = db._prepare_tenant
+
+    def slow_prepare(tenant):
+        if tenant == "kardiyo":
+            started.set()
+            release.wait(5)
+        return real_prepare(tenant)
+
+    monkeypatch.setattr(db, "_prepare_tenant", slow_prepare)
+    t = threading.Thread(target=cache.entry, args=("kardiyo",))
+    t.start()
+    assert started.wait(5)
+    try:
+        assert cache.entry("ir").path == db.tenant_db_path("ir")  # kardiyo hazırlanırken bile
+    finally:
+        release.set()
+        t.join()
+    assert set(cache.cached_tenants()) == {"ir", "kardiyo"}
+
+def test_evicted_tenant_is_not_prepared_again(monkeypatch):
+    cache = db.TenantCache(maxsize=1)
+    calls = []
+    real_prepare = db._prepare_tenant
+    monkeypatch.setattr(db, "_prepare_tenant", lambda t: (calls.append(t), real_prepare(t))[1])
+    for name in ("ir", "kardiyo", "ir", "kardiyo"):
+        cache.entry(name)
+    assert calls == ["ir", "kardiyo"]
+    assert cache.stats["ir"]["evictions"] == 2
+
+def test_tenant_metrics_requires_admin(app):
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["user"] = "hemsire"
+    assert c.get("/t/ir/api/tenants/metrics").status_code == 403